@@ -1,19 +1,29 @@
-import subprocess
-import sys
-from pathlib import Path
-
-ROOT = Path(__file__).resolve().parents[1]
-
-
-def test_help_option_succeeds():
-    result = subprocess.run(
-        [sys.executable, str(ROOT / "video_downloader_cli.py"), "--help"],
-        capture_output=True,
-        text=True,
-        check=False,
-    )
-    assert result.returncode == 0
-    assert "optional arguments" in result.stdout
-    assert "--output" in result.stdout
-    assert "Examples:" in result.stdout
-    assert "--list-formats" in result.stdout
+import argparse
+
+import video_downloader_cli as cli
+
+
+def test_help_option_succeeds(capsys):
+    assert cli.run_cli(["--help"]) == 0
+    out = capsys.readouterr().out
+    assert "--output" in out
+    assert "Examples:" in out
+    assert "--list-formats" in out
+    assert "--no-quiet" in out
+    assert "(default:" not in out
+
+
+def test_argument_error_returns_exit_code(capsys):
+    assert cli.run_cli(["x", "--audio-only", "-f", "b"]) == 2
+    assert "--audio-only cannot be combined with --format" in capsys.readouterr().err
+
+
+def test_boolean_flag_help_has_no_default_suffix():
+    # BooleanOptionalAction appends "(default: False)" on Python 3.9/3.10.
+    parser = argparse.ArgumentParser()
+    cli._add_flag(parser, "--demo", "Demo flag.")
+
+    (action,) = [a for a in parser._actions if "--demo" in a.option_strings]
+    assert action.help == "Demo flag."
+    assert action.option_strings == ["--demo", "--no-demo"]
+    assert action.default is False
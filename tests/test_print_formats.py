@@ -0,0 +1,91 @@
+import contextlib
+import io
+
+import video_downloader_cli as cli
+
+HEADER = (
+    "  itag    ext      res   fps      vcodec      acodec    filesize\n"
+    "----------------------------------------------------------------\n"
+)
+
+
+class CountingIO(io.StringIO):
+    writes = 0
+
+    def write(self, s):
+        self.writes += 1
+        return super().write(s)
+
+
+def render(info):
+    buf = CountingIO()
+    with contextlib.redirect_stdout(buf):
+        cli.print_formats(info)
+    return buf
+
+
+def test_print_formats_renders_table():
+    info = {
+        "formats": [
+            {
+                "format_id": "18",
+                "ext": "mp4",
+                "height": 360,
+                "fps": 30,
+                "vcodec": "avc1",
+                "acodec": "mp4a",
+                "filesize": 1234567,
+            },
+            {
+                "format_id": "140",
+                "ext": "m4a",
+                "acodec": "mp4a",
+                "filesize_approx": 5555,
+            },
+            {
+                "format_id": "22",
+                "ext": "mp4",
+                "resolution": "1280x720",
+                "vcodec": "avc1",
+            },
+        ]
+    }
+
+    assert render(info).getvalue() == HEADER + (
+        "    18    mp4     360p    30        avc1        mp4a      1.18MB\n"
+        "   140    m4a    audio                          mp4a      0.01MB\n"
+        "    22    mp4  1280x720              avc1                     n/a\n"
+    )
+
+
+def test_print_formats_without_formats():
+    assert render({}).getvalue() == "No formats available.\n"
+
+
+def test_print_formats_large_table_is_chunked():
+    formats = [
+        {
+            "format_id": str(i),
+            "ext": "mp4",
+            "height": i,
+            "fps": 30,
+            "vcodec": "avc1",
+            "acodec": "mp4a",
+            "filesize": i * 4096,
+        }
+        for i in range(1, 501)
+    ]
+
+    buf = render({"formats": formats})
+
+    lines = buf.getvalue().splitlines(keepends=True)
+    assert len(buf.getvalue()) > cli._WRITE_CHUNK_SIZE
+    assert len(lines) == 2 + len(formats)
+    assert "".join(lines[:2]) == HEADER
+    assert lines[2] == (
+        "     1    mp4       1p    30        avc1        mp4a      0.00MB\n"
+    )
+    assert lines[-1] == (
+        "   500    mp4     500p    30        avc1        mp4a      1.95MB\n"
+    )
+    assert buf.writes > 1
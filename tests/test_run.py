@@ -1,11 +1,34 @@
+import dataclasses
+import sys
+
+import pytest
+
 import video_downloader_cli as cli
 
+DOWNLOAD_FMT = "bestvideo*+bestaudio/best"
+
+
+class DummyYDL:
+    def __init__(self, opts):
+        self.opts = opts
+        self.downloaded = None
+
+    def __enter__(self):
+        return self
 
-def make_config(**overrides):
-    base = dict(
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def download(self, urls):
+        self.downloaded = urls
+
+
+@pytest.fixture(scope="module")
+def base_config():
+    return cli.DownloadConfig(
         url="https://example.com/watch?v=123",
         outtmpl="%(title)s.%(ext)s",
-        fmt="bestvideo*+bestaudio/best",
+        fmt=DOWNLOAD_FMT,
         quiet=False,
         audio_only=False,
         audio_format="mp3",
@@ -16,153 +39,143 @@ def make_config(**overrides):
         metadata_only=False,
         list_formats=False,
     )
-    base.update(overrides)
-    return cli.DownloadConfig(**base)
-
-
-def test_run_downloads_video(monkeypatch):
-    record = {}
-
-    class DummyYDL:
-        def __init__(self, opts):
-            record["opts"] = opts
-
-        def __enter__(self):
-            return self
-
-        def __exit__(self, exc_type, exc, tb):
-            return False
-
-        def download(self, urls):
-            record["download_called_with"] = urls
-
-    monkeypatch.setattr(cli, "YoutubeDL", DummyYDL)
-    monkeypatch.setattr(cli, "fetch_info", lambda ydl, url: {"id": "123"})
-    monkeypatch.setattr(cli, "first_entry", lambda info: info)
-
-    config = make_config()
-    exit_code = cli.run(config)
-
-    assert exit_code == 0
-    assert record["download_called_with"] == [config.url]
-    assert record["opts"]["format"] == config.fmt
-    assert record["opts"]["noplaylist"] is True
-
-
-def test_run_lists_formats(monkeypatch):
-    record = {"download_called": False, "print_formats_called": False}
-
-    class DummyYDL:
-        def __init__(self, opts):
-            record["opts"] = opts
 
-        def __enter__(self):
-            return self
 
-        def __exit__(self, exc_type, exc, tb):
-            return False
-
-        def download(self, urls):
-            record["download_called"] = True
-
-    def fake_print_formats(info):
-        record["print_formats_called"] = True
-        assert info["id"] == "fmt123"
-
-    monkeypatch.setattr(cli, "YoutubeDL", DummyYDL)
-    monkeypatch.setattr(cli, "fetch_info", lambda ydl, url: {"id": "fmt123"})
-    monkeypatch.setattr(cli, "first_entry", lambda info: info)
-    monkeypatch.setattr(cli, "print_formats", fake_print_formats)
-
-    config = make_config(list_formats=True)
-    exit_code = cli.run(config)
-
-    assert exit_code == 0
-    assert record["print_formats_called"] is True
-    assert record["download_called"] is False
-
-
-def test_run_prints_metadata(monkeypatch):
-    record = {"download_called": False, "print_metadata_called": False}
-
-    class DummyYDL:
-        def __init__(self, opts):
-            record["opts"] = opts
-
-        def __enter__(self):
-            return self
-
-        def __exit__(self, exc_type, exc, tb):
-            return False
-
-        def download(self, urls):
-            record["download_called"] = True
-
-    def fake_print_metadata(info):
-        record["print_metadata_called"] = True
-        assert info["title"] == "Sample"
-
-    monkeypatch.setattr(cli, "YoutubeDL", DummyYDL)
-    monkeypatch.setattr(cli, "fetch_info", lambda ydl, url: {"title": "Sample"})
-    monkeypatch.setattr(cli, "first_entry", lambda info: info)
-    monkeypatch.setattr(cli, "print_metadata", fake_print_metadata)
-
-    config = make_config(metadata_only=True)
-    exit_code = cli.run(config)
-
-    assert exit_code == 0
-    assert record["print_metadata_called"] is True
-    assert record["download_called"] is False
-
-
-def test_run_returns_fetch_failure(monkeypatch):
-    record = {}
-
-    class DummyYDL:
-        def __init__(self, opts):
-            record["opts"] = opts
-
-        def __enter__(self):
-            return self
+def make_config(base_config, **overrides):
+    return dataclasses.replace(base_config, **overrides)
+
+
+class DummyDownloadError(Exception):
+    pass
+
+
+def _raise_download_error(ydl, url):
+    raise DummyDownloadError("network down")
+
+
+# Each case: config overrides, fetch stub, expected exit code, expected side
+# effects, and the expected yt-dlp options as (probe instance?, "format" value).
+CASES = [
+    pytest.param(
+        {},
+        lambda ydl, url: {"id": "123"},
+        0,
+        {"download"},
+        (False, DOWNLOAD_FMT),
+        id="download",
+    ),
+    pytest.param(
+        {"list_formats": True},
+        lambda ydl, url: {"id": "fmt123"},
+        0,
+        {"print_formats"},
+        (True, None),
+        id="list-formats",
+    ),
+    pytest.param(
+        {"metadata_only": True},
+        lambda ydl, url: {"title": "Sample"},
+        0,
+        {"print_metadata"},
+        (True, None),
+        id="metadata",
+    ),
+    pytest.param(
+        {},
+        _raise_download_error,
+        2,
+        set(),
+        (False, DOWNLOAD_FMT),
+        id="fetch-failure",
+    ),
+    pytest.param(
+        {"playlist": True},
+        lambda ydl, url: {"_type": "playlist", "entries": [None, None]},
+        4,
+        set(),
+        (False, DOWNLOAD_FMT),
+        id="empty-playlist",
+    ),
+]
+
+
+@pytest.mark.parametrize("overrides,fetch,exit_code,effects,expected_opts", CASES)
+def test_run(
+    base_config,
+    capsys,
+    monkeypatch,
+    overrides,
+    fetch,
+    exit_code,
+    effects,
+    expected_opts,
+):
+    # Injected collaborators must be enough: importing yt-dlp would fail here.
+    monkeypatch.setitem(sys.modules, "yt_dlp", None)
+    created = []
+
+    def ydl_factory(opts):
+        created.append(DummyYDL(opts))
+        return created[-1]
+
+    config = make_config(base_config, **overrides)
+
+    result = cli.run(
+        config,
+        ydl_factory=ydl_factory,
+        fetch=fetch,
+        download_error=DummyDownloadError,
+    )
 
-        def __exit__(self, exc_type, exc, tb):
-            return False
+    assert result == exit_code
 
-    def raising_fetch_info(ydl, url):
-        raise cli.DownloadError("network down")
+    (ydl,) = created
+    out = capsys.readouterr().out
+    assert (ydl.downloaded == [config.url]) is ("download" in effects)
+    assert ("No formats available." in out) is ("print_formats" in effects)
+    assert ("Title     : Sample" in out) is ("print_metadata" in effects)
+    probe, fmt = expected_opts
+    assert ydl.opts.get("simulate", False) is probe
+    assert ydl.opts.get("format") == fmt
+    assert ydl.opts["noplaylist"] is not config.playlist
 
-    monkeypatch.setattr(cli, "YoutubeDL", DummyYDL)
-    monkeypatch.setattr(cli, "fetch_info", raising_fetch_info)
 
-    config = make_config()
-    exit_code = cli.run(config)
+def test_make_ydl_opts_returns_independent_copies(base_config):
+    config = make_config(base_config, audio_only=True, fmt="bestaudio/best")
 
-    assert exit_code == 2
+    opts = cli.make_ydl_opts(config)
+    opts["postprocessors"][0]["preferredcodec"] = "flac"
+    opts["postprocessors"].append({"key": "FFmpegMetadata"})
+    opts["format"] = "worst"
 
+    fresh = cli.make_ydl_opts(config)
+    assert fresh["postprocessors"] == [
+        {"key": "FFmpegExtractAudio", "preferredcodec": "mp3"}
+    ]
+    assert fresh["format"] == "bestaudio/best"
 
-def test_run_handles_empty_playlist(monkeypatch):
-    record = {}
 
-    class DummyYDL:
-        def __init__(self, opts):
-            record["opts"] = opts
+def test_run_reports_missing_dependency(base_config, monkeypatch, capsys):
+    monkeypatch.setattr(cli.importlib.util, "find_spec", lambda name: None)
 
-        def __enter__(self):
-            return self
+    assert cli.run(base_config) == 1
+    assert "yt-dlp is not installed" in capsys.readouterr().err
 
-        def __exit__(self, exc_type, exc, tb):
-            return False
 
-        def download(self, urls):
-            record["download_called"] = True
+def test_lazy_names_missing_without_yt_dlp(monkeypatch):
+    monkeypatch.setitem(sys.modules, "yt_dlp", None)
+    monkeypatch.delitem(vars(cli), "YoutubeDL", raising=False)
 
-    playlist_info = {"_type": "playlist", "entries": [None, None]}
+    assert not hasattr(cli, "YoutubeDL")
+    monkeypatch.setattr(cli, "YoutubeDL", DummyYDL, raising=False)
+    assert cli.YoutubeDL is DummyYDL
 
-    monkeypatch.setattr(cli, "YoutubeDL", DummyYDL)
-    monkeypatch.setattr(cli, "fetch_info", lambda ydl, url: playlist_info)
 
-    config = make_config(playlist=True)
-    exit_code = cli.run(config)
+def test_run_with_only_factory_reports_missing_dependency(
+    base_config, monkeypatch, capsys
+):
+    monkeypatch.setitem(sys.modules, "yt_dlp", None)
+    monkeypatch.delitem(vars(cli), "DownloadError", raising=False)
 
-    assert exit_code == 4
-    assert "download_called" not in record
+    assert cli.run(base_config, ydl_factory=DummyYDL) == 1
+    assert "yt-dlp is not installed" in capsys.readouterr().err
@@ -14,20 +14,52 @@ audio conversions.
 from __future__ import annotations
 
 import argparse
+import copy
+import functools
+import importlib.util
 import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, NoReturn, Optional
 
-try:
+if TYPE_CHECKING:  # pragma: no cover
     from yt_dlp import YoutubeDL
     from yt_dlp.utils import DownloadError
-except ImportError:  # pragma: no cover - handled gracefully at runtime
-    YoutubeDL = None
-    DownloadError = Exception
 
+_LAZY_YT_DLP_NAMES = ("YoutubeDL", "DownloadError")
 
-@dataclass
+
+def _load_yt_dlp() -> None:
+    """Bind ``YoutubeDL``/``DownloadError`` into the module on first use.
+
+    yt-dlp has a heavy import graph, so it is only pulled in once a command
+    actually talks to it; ``--help`` and argument errors never pay for it.
+    Names already present (e.g. patched in by tests) are left untouched.
+    """
+    namespace = globals()
+    if all(name in namespace for name in _LAZY_YT_DLP_NAMES):
+        return
+
+    import yt_dlp
+    import yt_dlp.utils
+
+    namespace.setdefault("YoutubeDL", yt_dlp.YoutubeDL)
+    namespace.setdefault("DownloadError", yt_dlp.utils.DownloadError)
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_YT_DLP_NAMES:
+        try:
+            _load_yt_dlp()
+        except ImportError as err:
+            raise AttributeError(
+                f"module {__name__!r} has no attribute {name!r} (yt-dlp is missing)"
+            ) from err
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@dataclass(frozen=True)
 class DownloadConfig:
     url: str
     outtmpl: str
@@ -43,16 +75,30 @@ class DownloadConfig:
     list_formats: bool
 
 
-def parse_args(argv: Optional[Iterable[str]] = None) -> argparse.Namespace:
+_EPILOG = """\
+Examples:
+  python video_downloader_cli.py "https://youtu.be/dQw4w9WgXcQ"
+  python video_downloader_cli.py "https://youtu.be/dQw4w9WgXcQ" --audio-only --audio-format mp3
+  python video_downloader_cli.py "https://youtu.be/dQw4w9WgXcQ" --list-formats"""
+
+
+def _add_flag(parser: argparse.ArgumentParser, flag: str, help_text: str) -> None:
+    """Add a ``--flag``/``--no-flag`` pair that defaults to False.
+
+    On Python 3.9 and 3.10 BooleanOptionalAction appends "(default: False)" to
+    the help text; reset it so ``--help`` reads the same on every version.
+    """
+    action = parser.add_argument(
+        flag, action=argparse.BooleanOptionalAction, default=False
+    )
+    action.help = help_text
+
+
+def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Download a single video (or optionally a playlist) using yt-dlp.",
         formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog=(
-            "Examples:\n"
-            "  python video_downloader_cli.py \"https://youtu.be/dQw4w9WgXcQ\"\n"
-            "  python video_downloader_cli.py \"https://youtu.be/dQw4w9WgXcQ\" --audio-only --audio-format mp3\n"
-            "  python video_downloader_cli.py \"https://youtu.be/dQw4w9WgXcQ\" --list-formats"
-        ),
+        epilog=_EPILOG,
     )
     parser.add_argument("url", help="Video or playlist URL to download.")
     parser.add_argument(
@@ -72,45 +118,41 @@ def parse_args(argv: Optional[Iterable[str]] = None) -> argparse.Namespace:
         default=None,
         help="Explicit yt-dlp format string (overrides audio-only selection).",
     )
-    parser.add_argument(
+    _add_flag(
+        parser,
         "--audio-only",
-        action="store_true",
-        help="Download audio only (best quality). Requires ffmpeg for conversion.",
+        "Download audio only (best quality). Requires ffmpeg for conversion.",
     )
     parser.add_argument(
         "--audio-format",
         default="mp3",
         help="Preferred audio format when using --audio-only. Defaults to mp3.",
     )
-    parser.add_argument(
+    _add_flag(
+        parser,
         "--keep-video",
-        action="store_true",
-        help="Keep the original downloaded video file after extracting audio.",
+        "Keep the original downloaded video file after extracting audio.",
     )
-    parser.add_argument(
+    _add_flag(
+        parser,
         "--playlist",
-        action="store_true",
-        help="Allow playlist downloads. By default only the first video is downloaded.",
+        "Allow playlist downloads. By default only the first video is downloaded.",
     )
-    parser.add_argument(
+    _add_flag(
+        parser,
         "--list-formats",
-        action="store_true",
-        help="List the available formats for the URL and exit.",
+        "List the available formats for the URL and exit.",
     )
-    parser.add_argument(
+    _add_flag(
+        parser,
         "--info",
-        action="store_true",
-        help="Show metadata for the URL and exit without downloading.",
+        "Show metadata for the URL and exit without downloading.",
     )
     parser.add_argument(
         "--proxy",
         help="Use the specified HTTP/HTTPS/SOCKS proxy.",
     )
-    parser.add_argument(
-        "--quiet",
-        action="store_true",
-        help="Reduce yt-dlp output to warnings/errors only.",
-    )
+    _add_flag(parser, "--quiet", "Reduce yt-dlp output to warnings/errors only.")
     parser.add_argument(
         "--retries",
         type=int,
@@ -118,17 +160,23 @@ def parse_args(argv: Optional[Iterable[str]] = None) -> argparse.Namespace:
         help="Number of download retries on failure. Defaults to 3.",
     )
 
-    args = parser.parse_args(argv)
+    return parser
+
+
+_PARSER = _build_parser()
+
+
+def parse_args(argv: Optional[Iterable[str]] = None) -> argparse.Namespace:
+    args = _PARSER.parse_args(argv)
 
     if args.audio_only and args.format:
-        parser.error("--audio-only cannot be combined with --format.")
+        _PARSER.error("--audio-only cannot be combined with --format.")
 
     return args
 
 
 def ensure_output_dir(path: Path) -> None:
-    if not path.exists():
-        path.mkdir(parents=True, exist_ok=True)
+    path.mkdir(parents=True, exist_ok=True)
 
 
 def build_config(args: argparse.Namespace) -> DownloadConfig:
@@ -157,10 +205,8 @@ def build_config(args: argparse.Namespace) -> DownloadConfig:
     )
 
 
-def make_ydl_opts(config: DownloadConfig) -> dict:
+def _base_ydl_opts(config: DownloadConfig) -> dict:
     opts: dict = {
-        "outtmpl": config.outtmpl,
-        "format": config.fmt,
         "quiet": config.quiet,
         "noplaylist": not config.playlist,
         "ignoreerrors": False,
@@ -170,6 +216,15 @@ def make_ydl_opts(config: DownloadConfig) -> dict:
     if config.proxy:
         opts["proxy"] = config.proxy
 
+    return opts
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_ydl_opts(config: DownloadConfig) -> dict:
+    opts = _base_ydl_opts(config)
+    opts["outtmpl"] = config.outtmpl
+    opts["format"] = config.fmt
+
     if config.audio_only:
         opts["postprocessors"] = [
             {
@@ -182,6 +237,19 @@ def make_ydl_opts(config: DownloadConfig) -> dict:
     return opts
 
 
+def make_ydl_opts(config: DownloadConfig) -> dict:
+    # Deep copy so callers (and yt-dlp) cannot mutate the cached options.
+    return copy.deepcopy(_cached_ydl_opts(config))
+
+
+def make_probe_opts(config: DownloadConfig) -> dict:
+    """Options for --list-formats/--info, which only extract metadata."""
+    opts = _base_ydl_opts(config)
+    # Safeguard only: run() never calls download() on the probe instance.
+    opts["simulate"] = True
+    return opts
+
+
 def fetch_info(ydl: YoutubeDL, url: str) -> dict:
     return ydl.extract_info(url, download=False)
 
@@ -189,30 +257,31 @@ def fetch_info(ydl: YoutubeDL, url: str) -> dict:
 def first_entry(info: dict) -> dict:
     if info.get("_type") != "playlist":
         return info
-    entries = info.get("entries") or []
-    for entry in entries:
-        if entry:  # skip None entries that yt-dlp can yield
-            return entry
-    raise ValueError("Playlist has no downloadable entries.")
+    # skip None entries that yt-dlp can yield
+    entry = next((e for e in info.get("entries") or () if e), None)
+    if entry is None:
+        raise ValueError("Playlist has no downloadable entries.")
+    return entry
 
 
-def print_formats(info: dict) -> None:
-    formats = info.get("formats") or []
-    if not formats:
-        print("No formats available.")
-        return
+_ROW_FMT = (
+    "{itag:>6}  {ext:>5}  {res:>7}  {fps:>4}  "
+    "{vcodec:>10}  {acodec:>10}  {filesize:>10}"
+)
+_FORMAT_COLUMNS = ("itag", "ext", "res", "fps", "vcodec", "acodec", "filesize")
+_FORMAT_HEADER = _ROW_FMT.format_map({name: name for name in _FORMAT_COLUMNS})
+
+
+_WRITE_CHUNK_SIZE = 8192
+
 
-    header = f"{'itag':>6}  {'ext':>5}  {'res':>7}  {'fps':>4}  {'vcodec':>10}  {'acodec':>10}  {'filesize':>10}"
-    print(header)
-    print("-" * len(header))
+def _iter_format_rows(formats: Iterable[dict]) -> Iterator[str]:
+    yield _FORMAT_HEADER
+    yield "-" * len(_FORMAT_HEADER)
     for fmt in formats:
-        itag = fmt.get("format_id", "n/a")
-        ext = fmt.get("ext", "n/a")
-        resolution = fmt.get("resolution") or fmt.get("height") or "audio"
-        fps = fmt.get("fps") or ""
-        vcodec = fmt.get("vcodec") or ""
-        acodec = fmt.get("acodec") or ""
-        filesize = fmt.get("filesize") or fmt.get("filesize_approx") or 0
+        fmt_get = fmt.get
+        resolution = fmt_get("resolution") or fmt_get("height") or "audio"
+        filesize = fmt_get("filesize") or fmt_get("filesize_approx") or 0
         if isinstance(resolution, int):
             resolution = f"{resolution}p"
         if filesize:
@@ -220,11 +289,41 @@ def print_formats(info: dict) -> None:
             filesize_str = f"{filesize_mb:>7.2f}MB"
         else:
             filesize_str = "   n/a"
-        print(
-            f"{itag:>6}  {ext:>5}  {str(resolution):>7}  {str(fps):>4}  {vcodec:>10}  {acodec:>10}  {filesize_str:>10}"
+        yield _ROW_FMT.format_map(
+            {
+                "itag": fmt_get("format_id", "n/a"),
+                "ext": fmt_get("ext", "n/a"),
+                "res": str(resolution),
+                "fps": str(fmt_get("fps") or ""),
+                "vcodec": fmt_get("vcodec") or "",
+                "acodec": fmt_get("acodec") or "",
+                "filesize": filesize_str,
+            }
         )
 
 
+def print_formats(info: dict) -> None:
+    formats = info.get("formats") or []
+    if not formats:
+        print("No formats available.")
+        return
+
+    # Batch rows into ~8 KB writes so long tables are neither written line by
+    # line nor joined into one large string.
+    buf: list = []
+    size = 0
+    for row in _iter_format_rows(formats):
+        line = row + "\n"
+        buf.append(line)
+        size += len(line)
+        if size >= _WRITE_CHUNK_SIZE:
+            sys.stdout.write("".join(buf))
+            buf.clear()
+            size = 0
+    if buf:
+        sys.stdout.write("".join(buf))
+
+
 def print_metadata(info: dict) -> None:
     title = info.get("title", "Unknown Title")
     uploader = info.get("uploader") or info.get("channel")
@@ -232,35 +331,53 @@ def print_metadata(info: dict) -> None:
     view_count = info.get("view_count")
     webpage_url = info.get("webpage_url")
 
-    print(f"Title     : {title}")
+    lines = [f"Title     : {title}"]
     if uploader:
-        print(f"Uploader  : {uploader}")
+        lines.append(f"Uploader  : {uploader}")
     if duration:
-        minutes, seconds = divmod(duration, 60)
-        print(f"Duration  : {minutes}m{seconds:02d}s")
+        lines.append(f"Duration  : {duration // 60}m{duration % 60:02d}s")
     if view_count is not None:
-        print(f"Views     : {view_count}")
+        lines.append(f"Views     : {view_count}")
     if webpage_url:
-        print(f"URL       : {webpage_url}")
+        lines.append(f"URL       : {webpage_url}")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
-def require_dependency() -> None:
-    if YoutubeDL is None:
+def require_dependency() -> bool:
+    if importlib.util.find_spec("yt_dlp") is None:
         print(
             "Error: yt-dlp is not installed. Install it with 'pip install yt-dlp'.",
             file=sys.stderr,
         )
-        sys.exit(1)
-
-
-def run(config: DownloadConfig) -> int:
-    require_dependency()
+        return False
+    return True
+
+
+def run(
+    config: DownloadConfig,
+    *,
+    ydl_factory: Optional[Callable[[dict], YoutubeDL]] = None,
+    fetch: Optional[Callable[[YoutubeDL, str], dict]] = None,
+    download_error: Optional[type[Exception]] = None,
+) -> int:
+    if ydl_factory is None or download_error is None:
+        if not require_dependency():
+            return 1
+        _load_yt_dlp()
+    ydl_factory = ydl_factory or YoutubeDL
+    download_error = download_error or DownloadError
+    fetch = fetch or fetch_info
+
+    if config.list_formats or config.metadata_only:
+        # Nothing is downloaded, so skip format selection and postprocessors.
+        opts = make_probe_opts(config)
+    else:
+        opts = make_ydl_opts(config)
 
-    opts = make_ydl_opts(config)
-    with YoutubeDL(opts) as ydl:
+    with ydl_factory(opts) as ydl:
         try:
-            info = fetch_info(ydl, config.url)
-        except DownloadError as err:
+            info = fetch(ydl, config.url)
+        except download_error as err:
             print(f"Failed to retrieve info: {err}", file=sys.stderr)
             return 2
 
@@ -280,18 +397,26 @@ def run(config: DownloadConfig) -> int:
 
         try:
             ydl.download([config.url])
-        except DownloadError as err:
+        except download_error as err:
             print(f"Download failed: {err}", file=sys.stderr)
             return 3
 
     return 0
 
 
-def main(argv: Optional[Iterable[str]] = None) -> int:
-    args = parse_args(argv)
+def run_cli(argv: Optional[Iterable[str]] = None) -> int:
+    """Run the CLI in-process and return its exit code instead of exiting."""
+    try:
+        args = parse_args(argv)
+    except SystemExit as exc:  # --help or an argument error
+        return int(exc.code or 0)
     config = build_config(args)
     return run(config)
 
 
+def main(argv: Optional[Iterable[str]] = None) -> NoReturn:
+    sys.exit(run_cli(argv))
+
+
 if __name__ == "__main__":
-    sys.exit(main())
+    main()